@@ -1,30 +1,51 @@
 import os
-import requests
-from config import MAX_VIDEO_DURATION, KEN_BURNS_INSTRUCTION
-from utils import download_file, create_black_placeholder, create_text_overlay_png, trim_video, contains_number_or_currency, extract_numbers, ensure_directory
+from config import MAX_VIDEO_DURATION, KEN_BURNS_INSTRUCTION, OVERLAY_INSTRUCTION, IMAGE_EXTENSION
+from downloader import download_file, scratch_base
+from image_pipeline import normalize_downloaded_image
+from utils import DeadlineExceeded, check_deadline, create_black_placeholder, create_text_overlay_png, trim_video, extract_numbers, ensure_directory
 
-def download_and_process_video(url, output_path, headers=None):
-    temp_path = output_path + ".temp.mp4"
+def download_and_process_video(url, output_path, headers=None, deadline=None):
+    temp_path = scratch_base(output_path) + ".temp.mp4"
     
-    success = download_file(url, temp_path, headers)
+    success = download_file(url, temp_path, headers, deadline=deadline)
     if not success:
         return None
     
+    try:
+        check_deadline(deadline)
+    except DeadlineExceeded:
+        os.remove(temp_path)
+        raise
+    
     trimmed_path = trim_video(temp_path, output_path, MAX_VIDEO_DURATION)
     return trimmed_path
 
-def download_and_process_image(url, output_path, headers=None):
-    success = download_file(url, output_path, headers)
+def download_and_process_image(url, output_path, headers=None, deadline=None):
+    # Raw downloads stay in scratch; only the normalized image lands in Assets/
+    temp_path = scratch_base(output_path) + ".download"
+    
+    success = download_file(url, temp_path, headers, deadline=deadline)
     if not success:
         return None
+    
+    try:
+        check_deadline(deadline)
+        normalize_downloaded_image(temp_path, output_path)
+    except DeadlineExceeded:
+        raise
+    except Exception as e:
+        print(f"       ⚠️  Could not normalize image: {e}")
+        return None
+    finally:
+        os.remove(temp_path)
     return output_path
 
-def create_asset(beat_data, media_result, assets_dir, index, phase):
+def create_asset(beat_data, media_result, assets_dir, index, phase, deadline=None):
     prefix = f"{str(index).zfill(3)}_{phase}"
     
     if media_result.get('url') and media_result.get('type') == 'video':
         output_path = os.path.join(assets_dir, f"{prefix}_Asset.mp4")
-        result = download_and_process_video(media_result['url'], output_path)
+        result = download_and_process_video(media_result['url'], output_path, deadline=deadline)
         if result:
             return {
                 "filename": f"{prefix}_Asset.mp4",
@@ -35,11 +56,11 @@ def create_asset(beat_data, media_result, assets_dir, index, phase):
             }
     
     elif media_result.get('url') and media_result.get('type') == 'image':
-        output_path = os.path.join(assets_dir, f"{prefix}_Asset.jpg")
-        result = download_and_process_image(media_result['url'], output_path)
+        output_path = os.path.join(assets_dir, f"{prefix}_Asset.{IMAGE_EXTENSION}")
+        result = download_and_process_image(media_result['url'], output_path, deadline=deadline)
         if result:
             return {
-                "filename": f"{prefix}_Asset.jpg",
+                "filename": f"{prefix}_Asset.{IMAGE_EXTENSION}",
                 "type": "image",
                 "source": media_result.get('source'),
                 "instruction": KEN_BURNS_INSTRUCTION,
@@ -58,9 +79,6 @@ def create_asset(beat_data, media_result, assets_dir, index, phase):
     }
 
 def create_number_overlay(beat_text, assets_dir, index, phase):
-    if not contains_number_or_currency(beat_text):
-        return None
-    
     numbers = extract_numbers(beat_text)
     if not numbers:
         return None
@@ -72,5 +90,5 @@ def create_number_overlay(beat_text, assets_dir, index, phase):
     return {
         "filename": f"{prefix}_Overlay.png",
         "text": numbers[0],
-        "instruction": "Overlay in bold yellow Montserrat font, center screen"
+        "instruction": OVERLAY_INSTRUCTION
     }
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -60,3 +61,79 @@ SFX_MAPPINGS = {
     "growth": "Rising tone, ascending sound",
     "decline": "Descending tone, falling sound"
 }
+
+SFX_KEYWORDS = {
+    "money": ["money", "cash", "dollar", "dollars", "profit", "profits", "revenue", "paid", "salary", "wealth", "rich", "fortune"],
+    "success": ["success", "succeeded", "won", "win", "victory", "triumph", "breakthrough"],
+    "failure": ["failed", "failure", "failing", "bankrupt", "bankruptcy", "collapse", "collapsed", "disaster", "crash"],
+    "reveal": ["secret", "revealed", "truth", "discovered", "hidden"],
+    "impact": ["shock", "shocking", "sudden", "suddenly", "hit"],
+    "growth": ["growth", "grew", "grow", "growing", "soared", "skyrocketed", "doubled", "tripled", "boom"],
+    "decline": ["decline", "declined", "dropped", "fell", "plummeted", "shrank", "lost", "losses"]
+}
+
+SFX_MEME_SUGGESTIONS = {
+    "money": "money printer go brrr",
+    "success": "success kid",
+    "failure": "this is fine",
+    "reveal": "surprised pikachu",
+    "impact": "shocked surprised guy",
+    "growth": "stonks",
+    "decline": "not stonks"
+}
+
+PRECLASSIFY_ENABLED = True
+
+HTTP_POOL_SIZE = 32
+# (requests, period in seconds): the full quota may be used as a burst
+GEMINI_RATE_LIMIT = (30, 60)
+PEXELS_RATE_LIMIT = (200, 3600)
+PIXABAY_RATE_LIMIT = (100, 60)
+BATCH_WORKERS = 4
+OUTPUT_BUFFER_SIZE = 65536
+
+SEARCH_TIMEOUT = (10, 30)
+
+DOWNLOAD_TIMEOUT = (10, 60)
+DOWNLOAD_SCRATCH_DIR = os.path.join(tempfile.gettempdir(), "yt-agentic-downloads")
+DOWNLOAD_BUFFER_SIZE = 1024 * 1024
+DOWNLOAD_SEGMENT_THRESHOLD = 16 * 1024 * 1024
+DOWNLOAD_SEGMENTS = 4
+DOWNLOAD_SEGMENT_WORKERS = 16
+
+OVERLAY_FONT_SIZE = 120
+OVERLAY_FONT_PATHS = [
+    "Montserrat-Bold.ttf",
+    "/usr/share/fonts/truetype/montserrat/Montserrat-Bold.ttf",
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
+    "DejaVuSans-Bold.ttf",
+    "Arial Bold.ttf"
+]
+OVERLAY_WORKERS = 4
+OVERLAY_INSTRUCTION = "Overlay in bold yellow Montserrat font, center screen"
+
+IMAGE_TARGET_SIZE = (1920, 1080)
+IMAGE_ZOOM_MARGIN = 1.1
+IMAGE_FORMAT = "JPEG"
+IMAGE_EXTENSION = "jpg"
+IMAGE_QUALITY = 88
+IMAGE_WORKERS = None
+
+PHASE_PRIORITY = {
+    "Hook": 0,
+    "Climax": 1,
+    "Reveal": 2,
+    "Conflict": 3,
+    "Pivot": 4,
+    "Context": 5
+}
+SCHEDULER_WORKERS = 4
+
+QUEUE_VISIBILITY_TIMEOUT = 300
+QUEUE_MAX_ATTEMPTS = 3
+QUEUE_RETRY_DELAY = 10
+QUEUE_POLL_INTERVAL = 2
+QUEUE_REQUEST_TIMEOUT = (10, 30)
+
+STREAM_SEGMENTATION = True
+ANALYSIS_WORKERS = 2
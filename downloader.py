@@ -0,0 +1,234 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import threading
+import requests
+from concurrent.futures import ThreadPoolExecutor, wait
+from config import DOWNLOAD_TIMEOUT, DOWNLOAD_BUFFER_SIZE, DOWNLOAD_SEGMENT_THRESHOLD, DOWNLOAD_SEGMENTS, DOWNLOAD_SEGMENT_WORKERS, DOWNLOAD_SCRATCH_DIR
+from utils import get_session, ensure_directory, check_deadline, capped_timeout
+
+class DownloadError(Exception):
+    pass
+
+class StalePartError(DownloadError):
+    # Partial data on disk no longer matches the remote file
+    pass
+
+class RangeIgnoredError(DownloadError):
+    # Server advertised byte ranges but answered a ranged GET with the whole file
+    pass
+
+_buffers = threading.local()
+_segment_executor = None
+_segment_executor_lock = threading.Lock()
+
+def get_segment_executor():
+    # Shared by every segmented download so its threads (and their buffers)
+    # are reused instead of recreated per file
+    global _segment_executor
+    with _segment_executor_lock:
+        if _segment_executor is None:
+            _segment_executor = ThreadPoolExecutor(max_workers=DOWNLOAD_SEGMENT_WORKERS, thread_name_prefix="segment")
+        return _segment_executor
+
+def get_buffer():
+    # One large buffer per thread, reused across every download it runs
+    buffer = getattr(_buffers, 'buffer', None)
+    if buffer is None:
+        buffer = _buffers.buffer = bytearray(DOWNLOAD_BUFFER_SIZE)
+    return buffer
+
+def scratch_base(filepath):
+    # Partial files live outside the project so Assets/ only ever holds
+    # finished files; the name is keyed by the destination path
+    ensure_directory(DOWNLOAD_SCRATCH_DIR)
+    key = hashlib.sha1(os.path.abspath(filepath).encode()).hexdigest()[:16]
+    return os.path.join(DOWNLOAD_SCRATCH_DIR, f"{key}_{os.path.basename(filepath)}")
+
+def probe_remote(url, headers=None, deadline=None):
+    remote = {"size": None, "accepts_ranges": False, "etag": None, "last_modified": None}
+    response = get_session().head(url, headers=headers, allow_redirects=True, timeout=capped_timeout(DOWNLOAD_TIMEOUT, deadline))
+    if response.status_code != 200:
+        return remote
+    length = response.headers.get('Content-Length')
+    etag = response.headers.get('ETag')
+    remote.update({
+        "size": int(length) if length and length.isdigit() else None,
+        "accepts_ranges": response.headers.get('Accept-Ranges', '').lower() == 'bytes',
+        # If-Range only accepts strong validators
+        "etag": etag if etag and not etag.startswith('W/') else None,
+        "last_modified": response.headers.get('Last-Modified')
+    })
+    return remote
+
+def if_range_value(remote):
+    return remote['etag'] or remote['last_modified']
+
+def part_paths_for(base, segments):
+    return [f"{base}.part"] if segments == 1 else [f"{base}.part{i}" for i in range(segments)]
+
+def discard_parts(base):
+    directory, prefix = os.path.split(base)
+    for name in os.listdir(directory):
+        if name.startswith(prefix + ".part") or name == prefix + ".assembled":
+            os.remove(os.path.join(directory, name))
+
+def prepare_resume(base, url, remote, segments):
+    # Keeps existing parts only if the sidecar proves they came from this exact
+    # remote file; otherwise starts clean. Returns whether resuming is allowed.
+    resumable = remote['accepts_ranges'] and remote['size'] is not None and if_range_value(remote) is not None
+    state = {
+        "url": url,
+        "size": remote['size'],
+        "etag": remote['etag'],
+        "last_modified": remote['last_modified'],
+        "segments": segments
+    }
+    sidecar_path = f"{base}.part.json"
+    
+    previous = None
+    if os.path.exists(sidecar_path):
+        try:
+            with open(sidecar_path) as f:
+                previous = json.load(f)
+        except (OSError, ValueError):
+            previous = None
+    
+    if not resumable or previous != state:
+        discard_parts(base)
+    if resumable:
+        with open(sidecar_path, 'w') as f:
+            json.dump(state, f)
+    return resumable
+
+def fetch_range(url, part_path, headers=None, start=0, end=None, resume=True, if_range=None, deadline=None):
+    # Streams bytes [start, end] of url into part_path, continuing from
+    # whatever an earlier attempt already left there. Returns bytes written.
+    existing = os.path.getsize(part_path) if resume and os.path.exists(part_path) else 0
+    if end is not None and existing >= end - start + 1:
+        return 0
+    
+    request_headers = dict(headers or {})
+    request_headers['Accept-Encoding'] = 'identity'
+    offset = start + existing
+    if offset > 0 or end is not None:
+        request_headers['Range'] = f"bytes={offset}-{'' if end is None else end}"
+        if existing and if_range:
+            request_headers['If-Range'] = if_range
+    
+    with get_session().get(url, headers=request_headers, stream=True, timeout=capped_timeout(DOWNLOAD_TIMEOUT, deadline)) as response:
+        if response.status_code == 416:
+            raise StalePartError("range not satisfiable")
+        if response.status_code == 200 and end is not None:
+            # Segment got the whole file: Range unsupported or If-Range failed
+            raise RangeIgnoredError("server ignored range request")
+        if response.status_code == 200 and offset > 0:
+            # Whole-file fetch whose resume was refused; start over
+            existing = 0
+        elif response.status_code not in (200, 206):
+            raise DownloadError(f"status_{response.status_code}")
+        
+        buffer = get_buffer()
+        view = memoryview(buffer)
+        written = 0
+        with open(part_path, 'ab' if existing else 'wb') as f:
+            while True:
+                n = response.raw.readinto(buffer)
+                if not n:
+                    break
+                f.write(view[:n])
+                written += n
+                check_deadline(deadline)
+    return written
+
+def download_segmented(url, base, remote, headers=None, deadline=None):
+    size = remote['size']
+    segment_size = -(-size // DOWNLOAD_SEGMENTS)
+    ranges = [(start, min(start + segment_size, size) - 1) for start in range(0, size, segment_size)]
+    part_paths = part_paths_for(base, len(ranges))
+    resume = prepare_resume(base, url, remote, len(ranges))
+    
+    executor = get_segment_executor()
+    futures = [
+        executor.submit(fetch_range, url, part_path, headers, start, end, resume, if_range_value(remote), deadline)
+        for part_path, (start, end) in zip(part_paths, ranges)
+    ]
+    # Let every segment settle before raising, so none is still writing a part
+    wait(futures)
+    written = sum(future.result() for future in futures)
+    
+    for part_path, (start, end) in zip(part_paths, ranges):
+        if os.path.getsize(part_path) != end - start + 1:
+            raise StalePartError(f"segment {os.path.basename(part_path)} has the wrong size")
+    
+    assembled_path = f"{base}.assembled"
+    with open(assembled_path, 'wb') as out:
+        for part_path in part_paths:
+            with open(part_path, 'rb') as part:
+                shutil.copyfileobj(part, out, DOWNLOAD_BUFFER_SIZE)
+    return assembled_path, written
+
+def download_single(url, base, remote, headers=None, deadline=None):
+    size = remote['size']
+    part_path = part_paths_for(base, 1)[0]
+    resume = prepare_resume(base, url, remote, 1)
+    
+    if resume and os.path.exists(part_path) and os.path.getsize(part_path) == size:
+        written = 0
+    else:
+        written = fetch_range(url, part_path, headers, resume=resume, if_range=if_range_value(remote), deadline=deadline)
+    
+    if size is not None and os.path.getsize(part_path) != size:
+        if os.path.getsize(part_path) > size:
+            raise StalePartError(f"size mismatch (expected {size}, got {os.path.getsize(part_path)})")
+        raise DownloadError(f"size mismatch (expected {size}, got {os.path.getsize(part_path)})")
+    return part_path, written
+
+def file_sha256(filepath):
+    digest = hashlib.sha256()
+    buffer = get_buffer()
+    view = memoryview(buffer)
+    with open(filepath, 'rb') as f:
+        while True:
+            n = f.readinto(buffer)
+            if not n:
+                break
+            digest.update(view[:n])
+    return digest.hexdigest()
+
+def download_file(url, filepath, headers=None, expected_sha256=None, deadline=None):
+    # DeadlineExceeded is left to propagate so callers can abandon the beat
+    started = time.monotonic()
+    base = scratch_base(filepath)
+    try:
+        remote = probe_remote(url, headers, deadline)
+        if remote['size'] is not None and remote['accepts_ranges'] and remote['size'] >= DOWNLOAD_SEGMENT_THRESHOLD:
+            try:
+                finished_path, written = download_segmented(url, base, remote, headers, deadline)
+            except RangeIgnoredError:
+                print("       ⚠️  Server ignored byte ranges, downloading as a single stream")
+                discard_parts(base)
+                remote = dict(remote, accepts_ranges=False)
+                finished_path, written = download_single(url, base, remote, headers, deadline)
+        else:
+            finished_path, written = download_single(url, base, remote, headers, deadline)
+        
+        if expected_sha256 and file_sha256(finished_path) != expected_sha256.lower():
+            raise StalePartError("hash check failed")
+        
+        shutil.move(finished_path, filepath)
+    except StalePartError as e:
+        print(f"       ⚠️  Download failed ({e}); discarding partial data")
+        discard_parts(base)
+        return False
+    except (requests.RequestException, OSError, DownloadError) as e:
+        print(f"       ⚠️  Download failed ({e}); partial data kept for resume")
+        return False
+    
+    discard_parts(base)
+    elapsed = max(time.monotonic() - started, 1e-6)
+    megabytes = written / (1024 * 1024)
+    print(f"       ⬇️  {megabytes:.1f} MB in {elapsed:.1f}s ({megabytes / elapsed:.1f} MB/s)")
+    return True
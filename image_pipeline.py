@@ -0,0 +1,74 @@
+import os
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from PIL import Image, ImageOps
+from config import IMAGE_TARGET_SIZE, IMAGE_ZOOM_MARGIN, IMAGE_FORMAT, IMAGE_QUALITY, IMAGE_WORKERS
+
+_executor = None
+_executor_lock = threading.Lock()
+_active = 0
+_active_lock = threading.Lock()
+
+def get_image_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # spawn keeps worker processes clear of the parent's thread/lock state
+            _executor = ProcessPoolExecutor(max_workers=IMAGE_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _executor
+
+def target_dimensions(width, height, target_size=IMAGE_TARGET_SIZE, margin=IMAGE_ZOOM_MARGIN):
+    # Smallest size that still covers the (zoom-padded) frame; never upscales
+    target_w = round(target_size[0] * margin)
+    target_h = round(target_size[1] * margin)
+    scale = min(1.0, max(target_w / width, target_h / height))
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+# EXIF orientations that swap width and height when applied
+TRANSPOSING_ORIENTATIONS = {5, 6, 7, 8}
+
+def normalize_image(input_path, output_path, target_size=IMAGE_TARGET_SIZE, margin=IMAGE_ZOOM_MARGIN):
+    with Image.open(input_path) as img:
+        # Size everything on the upright image; re-encoding drops the EXIF tag
+        transposed = img.getexif().get(0x0112) in TRANSPOSING_ORIENTATIONS
+        upright_w, upright_h = (img.height, img.width) if transposed else img.size
+        final_size = target_dimensions(upright_w, upright_h, target_size, margin)
+        
+        if img.format == 'JPEG':
+            # Let libjpeg decode at a reduced scale instead of full resolution
+            img.draft('RGB', (final_size[1], final_size[0]) if transposed else final_size)
+        
+        img = ImageOps.exif_transpose(img)
+        
+        factor = min(img.width // final_size[0], img.height // final_size[1])
+        if factor >= 2:
+            img = img.reduce(factor)
+        
+        if img.size != final_size:
+            img = img.resize(final_size, Image.LANCZOS)
+        
+        if img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info):
+            rgba = img.convert('RGBA')
+            img = Image.new('RGB', rgba.size, 'black')
+            img.paste(rgba, mask=rgba.split()[3])
+        elif img.mode != 'RGB':
+            img = img.convert('RGB')
+        
+        img.save(output_path, IMAGE_FORMAT, quality=IMAGE_QUALITY, optimize=True, progressive=True)
+    return output_path
+
+def normalize_downloaded_image(input_path, output_path):
+    # A lone normalization runs inline; the process pool (and its spawn cost)
+    # is only used once another one is already in progress on this process
+    global _active
+    with _active_lock:
+        use_pool = _active > 0
+        _active += 1
+    try:
+        if use_pool:
+            return get_image_executor().submit(normalize_image, input_path, output_path).result()
+        return normalize_image(input_path, output_path)
+    finally:
+        with _active_lock:
+            _active -= 1
@@ -0,0 +1,196 @@
+import json
+import time
+import sqlite3
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from config import QUEUE_VISIBILITY_TIMEOUT, QUEUE_MAX_ATTEMPTS, QUEUE_RETRY_DELAY, QUEUE_REQUEST_TIMEOUT
+from utils import get_session
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    project TEXT NOT NULL,
+    beat_index INTEGER NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    visible_at REAL NOT NULL DEFAULT 0,
+    worker TEXT,
+    result TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_claim ON jobs (status, visible_at, priority, id);
+CREATE INDEX IF NOT EXISTS jobs_project ON jobs (project, status);
+"""
+
+class JobQueue:
+    # Durable beat queue on a single SQLite file. Claimed jobs stay invisible
+    # for visibility_timeout seconds unless the worker extends its lease; if
+    # it stops doing so they become claimable again, up to max_attempts.
+    # The file uses WAL, so it must only be opened from one host; workers on
+    # other hosts go through serve_queue / RemoteJobQueue instead.
+    def __init__(self, db_path, visibility_timeout=QUEUE_VISIBILITY_TIMEOUT, max_attempts=QUEUE_MAX_ATTEMPTS):
+        self.db_path = db_path
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        conn = self.connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+        finally:
+            conn.close()
+
+    def connect(self):
+        return sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+
+    def execute(self, sql, params=()):
+        conn = self.connect()
+        try:
+            return conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+
+    def enqueue(self, project, beat_index, payload, priority=0):
+        self.execute(
+            "INSERT INTO jobs (project, beat_index, priority, payload) VALUES (?, ?, ?, ?)",
+            (project, beat_index, priority, json.dumps(payload))
+        )
+
+    def reap(self, conn, now):
+        # Expired leases below max_attempts stay claimable; the rest fail
+        conn.execute(
+            "UPDATE jobs SET status = 'failed', error = 'visibility timeout exceeded' "
+            "WHERE status = 'running' AND visible_at <= ? AND attempts >= ?",
+            (now, self.max_attempts)
+        )
+
+    def claim(self, worker_id):
+        now = time.time()
+        conn = self.connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            self.reap(conn, now)
+            row = conn.execute(
+                "SELECT id, payload FROM jobs WHERE status IN ('queued', 'running') AND visible_at <= ? "
+                "ORDER BY priority, id LIMIT 1",
+                (now,)
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = 'running', attempts = attempts + 1, visible_at = ?, worker = ? WHERE id = ?",
+                (now + self.visibility_timeout, worker_id, row[0])
+            )
+            conn.execute("COMMIT")
+            return {"id": row[0], "payload": json.loads(row[1])}
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def extend(self, job_id, worker_id):
+        conn = self.connect()
+        try:
+            cursor = conn.execute(
+                "UPDATE jobs SET visible_at = ? WHERE id = ? AND status = 'running' AND worker = ?",
+                (time.time() + self.visibility_timeout, job_id, worker_id)
+            )
+            return cursor.rowcount > 0
+        finally:
+            conn.close()
+
+    def complete(self, job_id, worker_id, result):
+        self.execute(
+            "UPDATE jobs SET status = 'done', result = ?, error = NULL WHERE id = ? AND status = 'running' AND worker = ?",
+            (json.dumps(result), job_id, worker_id)
+        )
+
+    def fail(self, job_id, worker_id, error):
+        self.execute(
+            "UPDATE jobs SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'queued' END, "
+            "visible_at = ?, error = ? WHERE id = ? AND status = 'running' AND worker = ?",
+            (self.max_attempts, time.time() + QUEUE_RETRY_DELAY, error, job_id, worker_id)
+        )
+
+    def cancel(self, project):
+        self.execute(
+            "UPDATE jobs SET status = 'cancelled' WHERE project = ? AND status IN ('queued', 'running')",
+            (project,)
+        )
+
+    def finished(self, project):
+        # Reaps too, so jobs whose last worker died still reach 'failed' when
+        # no worker is left to claim
+        conn = self.connect()
+        try:
+            self.reap(conn, time.time())
+            rows = conn.execute(
+                "SELECT beat_index, status, result, error FROM jobs WHERE project = ? AND status IN ('done', 'failed')",
+                (project,)
+            ).fetchall()
+        finally:
+            conn.close()
+        return [
+            {"beat_index": r[0], "status": r[1], "result": json.loads(r[2]) if r[2] else None, "error": r[3]}
+            for r in rows
+        ]
+
+WORKER_METHODS = {"claim", "extend", "complete", "fail"}
+
+def serve_queue(queue, host, port):
+    # Minimal JSON-over-HTTP front for a JobQueue so workers on other hosts
+    # never touch the SQLite file. No auth: bind to a trusted network only.
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            method = self.path.strip("/")
+            if method not in WORKER_METHODS:
+                self.send_error(404)
+                return
+            try:
+                args = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                body = json.dumps({"result": getattr(queue, method)(**args)}).encode()
+            except Exception as e:
+                self.send_error(500, str(e))
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+class RemoteJobQueue:
+    def __init__(self, url):
+        self.db_path = url.rstrip("/")
+
+    def call(self, method, **args):
+        response = get_session().post(f"{self.db_path}/{method}", json=args, timeout=QUEUE_REQUEST_TIMEOUT)
+        response.raise_for_status()
+        return response.json()["result"]
+
+    def claim(self, worker_id):
+        return self.call("claim", worker_id=worker_id)
+
+    def extend(self, job_id, worker_id):
+        return self.call("extend", job_id=job_id, worker_id=worker_id)
+
+    def complete(self, job_id, worker_id, result):
+        return self.call("complete", job_id=job_id, worker_id=worker_id, result=result)
+
+    def fail(self, job_id, worker_id, error):
+        return self.call("fail", job_id=job_id, worker_id=worker_id, error=error)
+
+def open_queue(target):
+    if target.startswith(("http://", "https://")):
+        return RemoteJobQueue(target)
+    return JobQueue(target)
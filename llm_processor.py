@@ -1,16 +1,21 @@
 from google import genai
 from google.genai import errors
 import json
+import re
 import time
 import random
-from config import GEMINI_API_KEY, BEAT_LENGTH_MIN, BEAT_LENGTH_MAX, PHASES, AI_STYLE_KEYWORDS, SFX_MAPPINGS
+from concurrent.futures import ThreadPoolExecutor
+from config import GEMINI_API_KEY, BEAT_LENGTH_MIN, BEAT_LENGTH_MAX, PHASES, AI_STYLE_KEYWORDS, SFX_MAPPINGS, SFX_KEYWORDS, SFX_MEME_SUGGESTIONS, PRECLASSIFY_ENABLED, GEMINI_RATE_LIMIT, STREAM_SEGMENTATION, ANALYSIS_WORKERS
+from utils import RateLimiter, DeadlineExceeded
 
 client = genai.Client(api_key=GEMINI_API_KEY)
 MODEL_NAME = 'models/gemini-2.0-flash-lite'
+gemini_limiter = RateLimiter(*GEMINI_RATE_LIMIT)
 
-def generate_content(prompt, retries=10, initial_delay=5.0):
+def generate_content(prompt, retries=10, initial_delay=5.0, deadline=None):
     for attempt in range(retries):
         try:
+            gemini_limiter.wait(deadline)
             response = client.models.generate_content(
                 model=MODEL_NAME,
                 contents=prompt
@@ -23,13 +28,79 @@ def generate_content(prompt, retries=10, initial_delay=5.0):
                 
                 # Exponential backoff with jitter: 2s, 4s, 8s, 16s + random jitter
                 sleep_time = (initial_delay * (2 ** attempt)) + random.uniform(0.1, 1.0)
+                if deadline is not None and time.monotonic() + sleep_time >= deadline:
+                    raise DeadlineExceeded("deadline_exceeded")
                 print(f"       ⚠️  Rate limit hit (429). Waiting {sleep_time:.1f}s before retry {attempt + 1}/{retries}...")
                 time.sleep(sleep_time)
             else:
                 raise  # Re-raise other errors immediately
     return ""
 
-segment_script_to_beats = lambda script_text: generate_content(
+def generate_content_stream(prompt, retries=10, initial_delay=5.0):
+    for attempt in range(retries):
+        started = False
+        try:
+            gemini_limiter.wait()
+            for chunk in client.models.generate_content_stream(
+                model=MODEL_NAME,
+                contents=prompt
+            ):
+                if chunk.text:
+                    started = True
+                    yield chunk.text
+            return
+        except errors.ClientError as e:
+            # Once text has been yielded a retry would duplicate it downstream
+            if e.code == 429 and not started:
+                if attempt == retries - 1:
+                    raise
+                
+                sleep_time = (initial_delay * (2 ** attempt)) + random.uniform(0.1, 1.0)
+                print(f"       ⚠️  Rate limit hit (429). Waiting {sleep_time:.1f}s before retry {attempt + 1}/{retries}...")
+                time.sleep(sleep_time)
+            else:
+                raise
+
+def iter_json_array(chunks):
+    # Yields each element of a streamed top-level JSON array as soon as it is
+    # complete. Anything before the opening bracket (e.g. a ```json fence) is skipped.
+    decoder = json.JSONDecoder()
+    buffer = ""
+    pos = None
+    
+    for chunk in chunks:
+        buffer += chunk
+        if pos is None:
+            start = buffer.find('[')
+            if start < 0:
+                continue
+            pos = start + 1
+        
+        while True:
+            while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+                pos += 1
+            if pos >= len(buffer):
+                break
+            if buffer[pos] == ']':
+                return
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                break
+            if end >= len(buffer) and not isinstance(item, (str, list, dict)):
+                # A number at the end of the buffer may still be growing
+                break
+            yield item
+            pos = end
+        
+        buffer = buffer[pos:]
+        pos = 0
+    
+    # Without the closing bracket the response was cut off; callers must not
+    # mistake the beats seen so far for the whole script
+    raise ValueError("stream ended before the closing ']' of the JSON array")
+
+segmentation_prompt = lambda script_text: (
     f"""You are a video editor AI. Break this script into "Visual Beats" for a YouTube video.
 
 RULES:
@@ -43,6 +114,10 @@ Return format example:
 ["In 1994 Steve Jobs", "returned to Apple", "The company was failing", "But he had a plan"]"""
 )
 
+segment_script_to_beats = lambda script_text: generate_content(segmentation_prompt(script_text))
+
+stream_script_beats = lambda script_text: iter_json_array(generate_content_stream(segmentation_prompt(script_text)))
+
 def analyze_beats_batch(beats):
     beats_json = json.dumps(beats)
     sfx_categories = list(SFX_MAPPINGS.keys())
@@ -78,7 +153,7 @@ Example Output format:
 ]"""
     return generate_content(prompt)
 
-generate_ai_prompt = lambda beat_text, context="": generate_content(
+generate_ai_prompt = lambda beat_text, context="", deadline=None: generate_content(
     f"""Generate a cinematic AI image prompt for this video beat.
 
 Beat: "{beat_text}"
@@ -89,7 +164,12 @@ The image should be dramatic, high-quality, and suitable for a professional YouT
 
 IMPORTANT: Add these style keywords at the end: {AI_STYLE_KEYWORDS}
 
-Return ONLY the prompt text, nothing else."""
+Return ONLY the prompt text, nothing else.""",
+    deadline=deadline
+)
+
+template_ai_prompt = lambda beat_text: (
+    f"Cinematic documentary still illustrating: \"{beat_text}\". {AI_STYLE_KEYWORDS}"
 )
 
 assign_phase = lambda beat_index, total_beats: (
@@ -115,84 +195,224 @@ def parse_json_response(response_text):
         print(f"       ⚠️  JSON Decode Error. Raw response: {cleaned[:100]}...")
         return []
 
-def process_script(script_text):
-    print("       ⏳ Segmenting script into beats...")
+# Only years in a date context ("in 1994", "by the 1980s", a leading "1994:").
+# Counts are not years: "fired 2000 workers" has no date word, "of"/"from"
+# are left out ("a total of 2000 workers"), and a lowercase plural right after
+# the number rejects the match ("by 2000 employees", "since 1500 stores").
+YEAR_PATTERN = re.compile(
+    r"(?:\b(?:in|since|by|until|till|during|circa|year|early|late|mid)\s+(?:the\s+)?|^)((?:1[5-9]\d{2}|20\d{2})s?)\b(?!\s*[%$])(?!\s+(?-i:[a-z]+s)\b)",
+    re.IGNORECASE
+)
+PROPER_NAME_PATTERN = re.compile(r"\b[A-Z][a-zA-Z&'.-]+(?:\s+[A-Z][a-zA-Z&'.-]+)*")
+SFX_KEYWORD_PATTERNS = {
+    category: re.compile(r'\b(?:' + '|'.join(re.escape(k) for k in keywords) + r')\b', re.IGNORECASE)
+    for category, keywords in SFX_KEYWORDS.items()
+}
+NAME_STOPWORDS = {"In", "On", "At", "By", "The", "A", "An", "But", "And", "Or", "So", "Then", "When", "After", "Before", "It", "He", "She", "They", "We", "You", "I", "This", "That", "His", "Her", "Their", "Our", "Its", "What", "Why", "How", "If"}
+CAPITALIZED_WORD_PATTERN = re.compile(r"\b[A-Z][a-zA-Z&'.-]*")
+
+def match_sfx_category(beat_text):
+    for category, pattern in SFX_KEYWORD_PATTERNS.items():
+        if pattern.search(beat_text):
+            return category
+    return None
+
+def extract_proper_names(beat_text):
+    names = []
+    for match in PROPER_NAME_PATTERN.finditer(beat_text):
+        words = match.group(0).split()
+        while words and words[0] in NAME_STOPWORDS:
+            words = words[1:]
+        # A lone capitalized first word is usually just sentence case
+        if match.start() == 0 and len(words) == 1 and len(match.group(0).split()) == 1:
+            continue
+        if words:
+            names.append(" ".join(words))
+    return names
+
+def has_capitalized_token(beat_text):
+    return any(word not in NAME_STOPWORDS for word in CAPITALIZED_WORD_PATTERN.findall(beat_text))
+
+def preclassify_beat(beat_text):
+    # Returns an analysis dict shaped like one item of analyze_beats_batch output,
+    # or None when the beat is ambiguous and needs the LLM.
+    year_match = YEAR_PATTERN.search(beat_text)
+    names = extract_proper_names(beat_text)
+    sfx_category = match_sfx_category(beat_text)
+
+    if year_match and names:
+        return {
+            "beat": beat_text,
+            "type": "historical",
+            "search_query": f"{' '.join(names)} {year_match.group(1)}",
+            "meme_suggestion": None,
+            "sfx": sfx_category or "transition"
+        }
+
+    # Any capitalized non-stopword (including a brand-led first word) may be a
+    # person or brand, which the LLM should get the chance to call historical
+    if sfx_category and not year_match and not has_capitalized_token(beat_text):
+        return {
+            "beat": beat_text,
+            "type": "abstract",
+            "search_query": "",
+            "meme_suggestion": SFX_MEME_SUGGESTIONS.get(sfx_category),
+            "sfx": sfx_category
+        }
+
+    return None
+
+def build_beat_entry(beat, analysis, global_index, total_beats):
+    phase = assign_phase(global_index, total_beats)
+    sfx_category = (analysis.get('sfx') or 'transition').lower()
+    sfx = SFX_MAPPINGS.get(sfx_category, "Swoosh, transition swoosh")
+
+    # Reconstruct the singular analysis object structure expected by main.py
+    beat_analysis_obj = {
+        "beat": beat,
+        "type": analysis.get('type', 'abstract'),
+        "search_query": analysis.get('search_query', ''),
+        "meme_suggestion": analysis.get('meme_suggestion'),
+        "person": None, # Simplification for batching
+        "brand": None,
+        "year": None,
+        "is_abstract": analysis.get('type') == 'abstract'
+    }
+
+    return {
+        "index": global_index + 1,
+        "beat": beat,
+        "phase": phase,
+        "analysis": beat_analysis_obj,
+        "sfx": sfx
+    }
+
+def build_fallback_entry(beat, global_index, total_beats):
+    return {
+        "index": global_index + 1,
+        "beat": beat,
+        "phase": assign_phase(global_index, total_beats),
+        "analysis": {
+            "type": "abstract", "search_query": "",
+            "meme_suggestion": None, "is_abstract": True
+        },
+        "sfx": "Swoosh, transition swoosh"
+    }
+
+def analyze_pending_batch(batch):
+    analysis_response = analyze_beats_batch(batch)
+    batch_analysis = parse_json_response(analysis_response)
+
+    # Ensure we have analysis for each beat, even if LLM messes up count
+    if len(batch_analysis) != len(batch):
+        print(f"       ⚠️  Batch size mismatch (Sent {len(batch)}, Got {len(batch_analysis)}). Using fallback alignment.")
+
+    analyses = []
+    for j, beat in enumerate(batch):
+        if j < len(batch_analysis) and isinstance(batch_analysis[j], dict):
+            analyses.append(batch_analysis[j])
+        else:
+            analyses.append({
+                "beat": beat, "type": "abstract",
+                "search_query": "", "meme_suggestion": None, "sfx": "transition"
+            })
+    return analyses
+
+def stream_and_analyze(script_text, batch_size=10):
+    # Classifies beats as segmentation streams in and sends every full batch of
+    # ambiguous beats to analyze_beats_batch without waiting for the rest.
+    beats = []
+    analyses = []
+    pending = []
+    batch_jobs = []
+    
+    with ThreadPoolExecutor(max_workers=ANALYSIS_WORKERS) as executor:
+        def submit_pending():
+            batch_indices = pending[:]
+            pending.clear()
+            print(f"       🔄 Batch {len(batch_jobs) + 1}: Processing {len(batch_indices)} beats...")
+            batch = [beats[i] for i in batch_indices]
+            batch_jobs.append((batch_indices, executor.submit(analyze_pending_batch, batch)))
+        
+        for beat in stream_script_beats(script_text):
+            if not isinstance(beat, str):
+                continue
+            beats.append(beat)
+            analysis = preclassify_beat(beat) if PRECLASSIFY_ENABLED else None
+            analyses.append(analysis)
+            if analysis is None:
+                pending.append(len(beats) - 1)
+            if len(pending) >= batch_size:
+                submit_pending()
+        
+        if pending:
+            submit_pending()
+        
+        failed = set()
+        for batch_indices, future in batch_jobs:
+            try:
+                for i, analysis in zip(batch_indices, future.result()):
+                    analyses[i] = analysis
+            except Exception as e:
+                print(f"       ❌ Error processing batch: {e}")
+                failed.update(batch_indices)
+    
+    pending_total = sum(len(indices) for indices, _ in batch_jobs)
+    print(f"       ⚡ Pre-classified {len(beats) - pending_total}/{len(beats)} beats locally")
+    return beats, analyses, failed
+
+def segment_and_analyze(script_text, batch_size=10):
     beats_response = segment_script_to_beats(script_text)
     beats = parse_json_response(beats_response)
     
     if not beats:
-        return []
+        return [], [], set()
 
-    print(f"       📊 Processing {len(beats)} beats in batches of 10...")
-    processed_beats = []
-    
-    # Process in batches of 10
-    batch_size = 10
     total_beats = len(beats)
+    analyses = [preclassify_beat(beat) if PRECLASSIFY_ENABLED and isinstance(beat, str) else None for beat in beats]
+    pending = [i for i, analysis in enumerate(analyses) if analysis is None]
+    print(f"       ⚡ Pre-classified {total_beats - len(pending)}/{total_beats} beats locally")
+
+    print(f"       📊 Processing {len(pending)} beats in batches of {batch_size}...")
+    failed = set()
     
-    for i in range(0, total_beats, batch_size):
-        batch = beats[i:i + batch_size]
-        print(f"       🔄 Batch {i//batch_size + 1}: Processing beats {i+1}-{min(i+batch_size, total_beats)}...")
+    for b in range(0, len(pending), batch_size):
+        batch_indices = pending[b:b + batch_size]
+        batch = [beats[i] for i in batch_indices]
+        print(f"       🔄 Batch {b//batch_size + 1}: Processing {len(batch)} beats...")
         
         try:
-            analysis_response = analyze_beats_batch(batch)
-            batch_analysis = parse_json_response(analysis_response)
-            
-            # Ensure we have analysis for each beat, even if LLM messes up count
-            # Map by index or matching text ideally, but simple zip for now
-            # Fallback for mismatches
-            if len(batch_analysis) != len(batch):
-                print(f"       ⚠️  Batch size mismatch (Sent {len(batch)}, Got {len(batch_analysis)}). Using fallback alignment.")
-            
-            for j, beat in enumerate(batch):
-                # Safely get analysis or default
-                if j < len(batch_analysis):
-                    analysis = batch_analysis[j]
-                else:
-                    analysis = {
-                        "beat": beat, "type": "abstract", 
-                        "search_query": "", "meme_suggestion": None, "sfx": "transition"
-                    }
-                
-                global_index = i + j
-                phase = assign_phase(global_index, total_beats)
-                sfx_category = analysis.get('sfx', 'transition').lower()
-                sfx = SFX_MAPPINGS.get(sfx_category, "Swoosh, transition swoosh")
-                
-                # Reconstruct the singular analysis object structure expected by main.py
-                beat_analysis_obj = {
-                    "beat": beat,
-                    "type": analysis.get('type', 'abstract'),
-                    "search_query": analysis.get('search_query', ''),
-                    "meme_suggestion": analysis.get('meme_suggestion'),
-                    "person": None, # Simplification for batching
-                    "brand": None,
-                    "year": None, 
-                    "is_abstract": analysis.get('type') == 'abstract'
-                }
-
-                processed_beats.append({
-                    "index": global_index + 1,
-                    "beat": beat,
-                    "phase": phase,
-                    "analysis": beat_analysis_obj,
-                    "sfx": sfx
-                })
-                
+            for i, analysis in zip(batch_indices, analyze_pending_batch(batch)):
+                analyses[i] = analysis
         except Exception as e:
             print(f"       ❌ Error processing batch: {e}")
-            # Fallback for entire failed batch
-            for j, beat in enumerate(batch):
-                global_index = i + j
-                processed_beats.append({
-                    "index": global_index + 1,
-                    "beat": beat,
-                    "phase": assign_phase(global_index, total_beats),
-                    "analysis": {
-                        "type": "abstract", "search_query": "", 
-                        "meme_suggestion": None, "is_abstract": True
-                    },
-                    "sfx": "Swoosh, transition swoosh"
-                })
+            failed.update(batch_indices)
+
+    return beats, analyses, failed
+
+def process_script(script_text):
+    beats = []
+    if STREAM_SEGMENTATION:
+        print("       ⏳ Segmenting script into beats (streaming)...")
+        try:
+            beats, analyses, failed = stream_and_analyze(script_text)
+        except Exception as e:
+            print(f"       ⚠️  Streaming segmentation failed ({e}). Retrying without streaming...")
+            beats = []
+    
+    if not beats:
+        print("       ⏳ Segmenting script into beats...")
+        beats, analyses, failed = segment_and_analyze(script_text)
+    
+    if not beats:
+        return []
+
+    total_beats = len(beats)
+    processed_beats = []
+    for i, beat in enumerate(beats):
+        if i in failed:
+            processed_beats.append(build_fallback_entry(beat, i, total_beats))
+        else:
+            processed_beats.append(build_beat_entry(beat, analyses[i], i, total_beats))
 
     return processed_beats
@@ -1,10 +1,21 @@
 import os
 import sys
-from config import GEMINI_API_KEY, PEXELS_API_KEY, PIXABAY_API_KEY
+import json
+import time
+import uuid
+import socket
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from config import GEMINI_API_KEY, PEXELS_API_KEY, PIXABAY_API_KEY, BATCH_WORKERS, SCHEDULER_WORKERS, QUEUE_POLL_INTERVAL, QUEUE_VISIBILITY_TIMEOUT, QUEUE_MAX_ATTEMPTS, QUEUE_RETRY_DELAY
+from utils import write_json, ensure_directory, sanitize_filename, check_deadline
 from llm_processor import process_script, generate_ai_prompt
-from media_search import search_media
+from media_search import search_media, evict_cached_search
 from asset_processor import create_asset, create_number_overlay
-from output_generator import create_project_structure, add_image_prompt, finalize_outputs
+from overlay_engine import submit_overlays, collect_overlay
+from scheduler import run_with_deadline, beat_priority, degrade_beat
+from job_queue import JobQueue, open_queue, serve_queue
+from output_generator import create_project_structure, add_image_prompt, start_project_outputs, record_beat_output, finalize_outputs, close_project_outputs
 
 def validate_api_keys():
     missing = []
@@ -48,7 +59,8 @@ def get_project_title():
     title = input("> ").strip()
     return title if title else "Video_Project"
 
-def process_beat(beat_data, paths):
+def process_beat(beat_data, paths, overlay_jobs=None, record_prompt=True, deadline=None):
+    # With a deadline, DeadlineExceeded is raised before any slow step starts
     print(f"\n  [{beat_data['index']:03d}] Processing: \"{beat_data['beat'][:40]}...\"")
     
     analysis = beat_data['analysis']
@@ -59,11 +71,12 @@ def process_beat(beat_data, paths):
         search_query = analysis.get('search_query', beat_data['beat'])
         print(f"       🔍 Searching for: {search_query}")
         
-        media_result = search_media(search_query, "video")
+        check_deadline(deadline)
+        media_result = search_media(search_query, "video", deadline)
         
         if media_result.get('error') == 'rate_limit':
             print("       ⚠️  Rate limited, trying image search...")
-            media_result = search_media(search_query, "image")
+            media_result = search_media(search_query, "image", deadline)
         
         if media_result.get('url'):
             print(f"       ✅ Found {media_result['type']} from {media_result['source']}")
@@ -72,16 +85,21 @@ def process_beat(beat_data, paths):
                 media_result,
                 paths['assets_dir'],
                 beat_data['index'],
-                beat_data['phase']
+                beat_data['phase'],
+                deadline
             )
+            if not asset_result.get('success'):
+                evict_cached_search(search_query, media_result['type'])
         else:
             print("       ⚠️  No footage found, generating AI prompt...")
-            ai_prompt = generate_ai_prompt(beat_data['beat'])
+            check_deadline(deadline)
+            ai_prompt = generate_ai_prompt(beat_data['beat'], deadline=deadline)
     else:
         meme = analysis.get('meme_suggestion')
         if meme:
             print(f"       🎭 Meme suggestion: {meme}")
-            media_result = search_media(meme, "image")
+            check_deadline(deadline)
+            media_result = search_media(meme, "image", deadline)
             if media_result.get('url'):
                 print(f"       ✅ Found meme image from {media_result['source']}")
                 asset_result = create_asset(
@@ -89,21 +107,26 @@ def process_beat(beat_data, paths):
                     media_result,
                     paths['assets_dir'],
                     beat_data['index'],
-                    beat_data['phase']
+                    beat_data['phase'],
+                    deadline
                 )
+                if not asset_result.get('success'):
+                    evict_cached_search(meme, "image")
         
         if not asset_result:
             print("       🎨 Generating cinematic AI prompt...")
-            ai_prompt = generate_ai_prompt(beat_data['beat'])
+            check_deadline(deadline)
+            ai_prompt = generate_ai_prompt(beat_data['beat'], deadline=deadline)
     
     if ai_prompt:
-        add_image_prompt(
-            paths['image_prompts_path'],
-            beat_data['index'],
-            beat_data['phase'],
-            ai_prompt
-        )
-        print(f"       📝 AI prompt saved")
+        if record_prompt:
+            add_image_prompt(
+                paths['image_prompts_path'],
+                beat_data['index'],
+                beat_data['phase'],
+                ai_prompt
+            )
+            print(f"       📝 AI prompt saved")
         
         if not asset_result:
             asset_result = create_asset(
@@ -114,12 +137,15 @@ def process_beat(beat_data, paths):
                 beat_data['phase']
             )
     
-    overlay = create_number_overlay(
-        beat_data['beat'],
-        paths['assets_dir'],
-        beat_data['index'],
-        beat_data['phase']
-    )
+    if overlay_jobs is not None:
+        overlay = collect_overlay(overlay_jobs, beat_data['index'])
+    else:
+        overlay = create_number_overlay(
+            beat_data['beat'],
+            paths['assets_dir'],
+            beat_data['index'],
+            beat_data['phase']
+        )
     
     if overlay:
         print(f"       🔢 Number overlay created: {overlay['text']}")
@@ -130,19 +156,122 @@ def process_beat(beat_data, paths):
         "overlay": overlay
     }
 
-def main():
-    if not validate_api_keys():
-        sys.exit(1)
+def gather_distributed(processed_beats, paths, queue, budget=None):
+    project = f"{paths['project_dir']}#{uuid.uuid4().hex[:8]}"
+    for beat_data in processed_beats:
+        queue.enqueue(
+            project,
+            beat_data['index'],
+            {"beat_data": beat_data, "paths": paths},
+            beat_priority(beat_data)[0]
+        )
+    print(f"   📤 Published {len(processed_beats)} beat jobs to {queue.db_path}")
     
-    script_text = get_script_input()
-    if not script_text.strip():
-        print("❌ No script provided. Exiting.")
-        sys.exit(1)
+    deadline = None if budget is None else time.monotonic() + budget
+    beats_by_index = {b['index']: b for b in processed_beats}
+    results = {}
     
-    project_title = get_project_title()
+    while len(results) < len(processed_beats):
+        for job in queue.finished(project):
+            beat_data = beats_by_index[job['beat_index']]
+            if beat_data['index'] in results:
+                continue
+            if job['status'] == 'done':
+                result = job['result']
+                if result.get('ai_prompt'):
+                    add_image_prompt(paths['image_prompts_path'], beat_data['index'], beat_data['phase'], result['ai_prompt'])
+            else:
+                print(f"  [{beat_data['index']:03d}] ❌ Job failed: {job['error']}")
+                result = degrade_beat(beat_data, paths, reason=job['error'] or "worker_failed")
+            results[beat_data['index']] = result
+            record_beat_output(paths, beat_data, result)
+        
+        if len(results) == len(processed_beats):
+            break
+        if deadline is not None and time.monotonic() >= deadline:
+            queue.cancel(project)
+            remaining = [b for b in processed_beats if b['index'] not in results]
+            print(f"\n⏰ Deadline reached: {len(remaining)} beats fall back to placeholders + AI prompts")
+            for beat_data in remaining:
+                results[beat_data['index']] = degrade_beat(beat_data, paths)
+                record_beat_output(paths, beat_data, results[beat_data['index']])
+            break
+        time.sleep(QUEUE_POLL_INTERVAL)
+    
+    return [results[b['index']] for b in processed_beats]
+
+def keep_lease(queue, job_id, worker_id, stop):
+    # Renews the job's visibility while process_beat runs, so slow beats are
+    # not handed to a second worker
+    while not stop.wait(QUEUE_VISIBILITY_TIMEOUT / 3):
+        try:
+            if not queue.extend(job_id, worker_id):
+                print(f"       ⚠️  Lost lease on job {job_id}; its result will be discarded")
+                return
+        except Exception as e:
+            print(f"       ⚠️  Could not extend lease on job {job_id}: {e}")
+
+def report_with_retry(report, job_id, worker_id, outcome, attempts=QUEUE_MAX_ATTEMPTS):
+    for attempt in range(attempts):
+        try:
+            report(job_id, worker_id, outcome)
+            return
+        except Exception as e:
+            print(f"       ⚠️  Could not report job {job_id} ({attempt + 1}/{attempts}): {e}")
+            time.sleep(QUEUE_RETRY_DELAY)
+    # Give up; the lease expires and the job is retried or reaped as failed
+
+def run_worker(queue_target, threads=1, idle_exit=None):
+    # queue_target is the coordinator's SQLite file (same host only) or its
+    # --queue-listen URL. Paths in the jobs are the coordinator's; every worker
+    # host must see the project folders at the same location (e.g. a shared mount).
+    queue = open_queue(queue_target)
+    worker_base = f"{socket.gethostname()}:{os.getpid()}"
+    print(f"\n🛠️  Worker {worker_base} polling {queue_target} with {threads} threads")
+    
+    def loop(n):
+        worker_id = f"{worker_base}:{n}"
+        idle_since = time.monotonic()
+        while True:
+            try:
+                job = queue.claim(worker_id)
+            except Exception as e:
+                print(f"  ⚠️  Worker {worker_id} could not claim a job: {e}")
+                time.sleep(QUEUE_POLL_INTERVAL)
+                continue
+            if job is None:
+                if idle_exit is not None and time.monotonic() - idle_since >= idle_exit:
+                    return
+                time.sleep(QUEUE_POLL_INTERVAL)
+                continue
+            
+            beat_data = job['payload']['beat_data']
+            paths = job['payload']['paths']
+            stop = threading.Event()
+            threading.Thread(target=keep_lease, args=(queue, job['id'], worker_id, stop), daemon=True).start()
+            try:
+                ensure_directory(paths['assets_dir'])
+                report, outcome = queue.complete, process_beat(beat_data, paths, None, record_prompt=False)
+            except Exception as e:
+                print(f"  [{beat_data['index']:03d}] ❌ Job {job['id']} failed: {e}")
+                report, outcome = queue.fail, str(e)
+            try:
+                # The lease is kept while reporting, so a queue that is briefly
+                # unreachable does not hand the job to another worker
+                report_with_retry(report, job['id'], worker_id, outcome)
+            finally:
+                stop.set()
+            idle_since = time.monotonic()
+    
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        for future in [executor.submit(loop, n) for n in range(threads)]:
+            future.result()
+
+def run_project(script_text, project_title, budget=None, beat_workers=SCHEDULER_WORKERS, queue_path=None):
+    started = time.monotonic()
     
     print("\n" + "=" * 60)
-    print("📊 ANALYZING SCRIPT")
+    print(f"📊 ANALYZING SCRIPT: {project_title}")
     print("=" * 60)
     
     print("\n🧠 Breaking script into visual beats...")
@@ -151,22 +280,40 @@ def main():
     
     paths = create_project_structure(project_title)
     print(f"\n📁 Created project folder: {paths['project_dir']}")
+    start_project_outputs(paths, project_title)
     
-    print("\n" + "=" * 60)
-    print("🎥 GATHERING ASSETS")
-    print("=" * 60)
-    
-    asset_results = []
-    for beat_data in processed_beats:
-        result = process_beat(beat_data, paths)
-        asset_results.append(result)
-    
-    print("\n" + "=" * 60)
-    print("📋 GENERATING OUTPUTS")
-    print("=" * 60)
-    
-    summary = finalize_outputs(paths, processed_beats, asset_results, project_title)
-    
+    try:
+        print("\n" + "=" * 60)
+        print("🎥 GATHERING ASSETS")
+        print("=" * 60)
+        
+        remaining = None if budget is None else max(0.0, budget - (time.monotonic() - started))
+        
+        if queue_path:
+            # Workers render overlays alongside the rest of each beat
+            asset_results = gather_distributed(processed_beats, paths, JobQueue(queue_path), remaining)
+        elif remaining is not None:
+            overlay_jobs = submit_overlays(processed_beats, paths['assets_dir'])
+            print(f"   ⏱️  Time budget: {remaining:.0f}s left across {beat_workers} workers")
+            asset_results = run_with_deadline(processed_beats, paths, process_beat, remaining, overlay_jobs, beat_workers)
+        else:
+            overlay_jobs = submit_overlays(processed_beats, paths['assets_dir'])
+            asset_results = []
+            for beat_data in processed_beats:
+                result = process_beat(beat_data, paths, overlay_jobs)
+                record_beat_output(paths, beat_data, result)
+                asset_results.append(result)
+        
+        print("\n" + "=" * 60)
+        print("📋 GENERATING OUTPUTS")
+        print("=" * 60)
+        
+        return finalize_outputs(paths, asset_results)
+    finally:
+        # Writers are path-keyed and process-wide; never leave them open
+        close_project_outputs(paths)
+
+def print_summary(summary):
     print(f"\n✅ COMPLETE!")
     print(f"   📁 Project folder: {summary['project_dir']}")
     print(f"   🎬 Total assets: {summary['assets_count']}")
@@ -176,7 +323,132 @@ def main():
     print(f"   - Assets/          (video/image files)")
     print(f"   - Image_Prompts.txt (AI prompts for manual generation)")
     print(f"   - Editing_Notes.json (beat-to-asset mapping with SFX)")
+    print(f"   - Editing_Notes.jsonl (per-beat notes, written as beats complete)")
     print(f"   - manifest.txt     (success/error log)")
 
+def load_batch_jobs(source):
+    # A directory of .txt scripts (title = file name) or a JSON manifest of
+    # [{"title": ..., "script": ...}] / [{"title": ..., "script_path": ...}]
+    jobs = []
+    if os.path.isdir(source):
+        for name in sorted(os.listdir(source)):
+            if not name.lower().endswith(".txt"):
+                continue
+            with open(os.path.join(source, name)) as f:
+                script_text = " ".join(line.strip() for line in f if line.strip())
+            jobs.append({"title": os.path.splitext(name)[0], "script": script_text})
+        return jobs
+    
+    with open(source) as f:
+        entries = json.load(f)
+    base_dir = os.path.dirname(os.path.abspath(source))
+    for entry in entries:
+        script_text = entry.get("script")
+        if script_text is None and entry.get("script_path"):
+            with open(os.path.join(base_dir, entry["script_path"])) as f:
+                script_text = " ".join(line.strip() for line in f if line.strip())
+        jobs.append({"title": entry.get("title") or "Video_Project", "script": script_text or ""})
+    return jobs
+
+def dedupe_titles(jobs):
+    # Titles that sanitize to the same folder name would share a project dir
+    # (and its output writers), so later ones get a numeric suffix
+    seen = set()
+    for job in jobs:
+        base = sanitize_filename(job["title"])
+        folder = base
+        n = 2
+        while folder.lower() in seen:
+            suffix = f"_{n}"
+            folder = base[:50 - len(suffix)] + suffix
+            n += 1
+        seen.add(folder.lower())
+        if folder != base:
+            job["title"] = folder
+    return jobs
+
+def run_batch(source, workers=BATCH_WORKERS, budget=None, beat_workers=SCHEDULER_WORKERS, queue_path=None):
+    jobs = dedupe_titles([job for job in load_batch_jobs(source) if job["script"].strip()])
+    if not jobs:
+        print(f"❌ No scripts found in {source}. Exiting.")
+        sys.exit(1)
+    
+    print(f"\n🗂️  Batch mode: {len(jobs)} scripts, {workers} workers")
+    results = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(run_project, job["script"], job["title"], budget, beat_workers, queue_path): job for job in jobs}
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                summary = future.result()
+                print(f"\n✅ Finished: {job['title']} ({summary['successful']}/{summary['assets_count']} downloaded)")
+                results.append({"title": job["title"], "success": True, **summary})
+            except Exception as e:
+                print(f"\n❌ Failed: {job['title']}: {e}")
+                results.append({"title": job["title"], "success": False, "error": str(e)})
+    
+    results.sort(key=lambda r: r["title"])
+    batch_summary = {
+        "projects": results,
+        "projects_completed": sum(1 for r in results if r["success"]),
+        "projects_failed": sum(1 for r in results if not r["success"]),
+        "assets_count": sum(r.get("assets_count", 0) for r in results),
+        "successful": sum(r.get("successful", 0) for r in results),
+        "prompts_generated": sum(r.get("prompts_generated", 0) for r in results)
+    }
+    summary_path = os.path.join(os.getcwd(), "batch_summary.json")
+    write_json(batch_summary, summary_path)
+    
+    print("\n" + "=" * 60)
+    print("🗂️  BATCH COMPLETE")
+    print("=" * 60)
+    print(f"   📁 Projects: {batch_summary['projects_completed']} completed, {batch_summary['projects_failed']} failed")
+    print(f"   🎬 Total assets: {batch_summary['assets_count']}")
+    print(f"   ✅ Downloaded: {batch_summary['successful']}")
+    print(f"   📝 AI prompts: {batch_summary['prompts_generated']}")
+    print(f"   📄 Summary: {summary_path}")
+    return batch_summary
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="YouTube Visual Assets Generator")
+    parser.add_argument("--batch", metavar="PATH", help="directory of .txt scripts or JSON manifest to process non-interactively")
+    parser.add_argument("--workers", type=int, default=BATCH_WORKERS, help="concurrent projects in batch mode")
+    parser.add_argument("--budget", type=float, metavar="SECONDS", help="wall-clock budget for gathering assets; remaining beats get placeholders")
+    parser.add_argument("--beat-workers", type=int, default=SCHEDULER_WORKERS, help="concurrent beats per project when --budget is set, or threads per --worker process")
+    parser.add_argument("--coordinator", metavar="QUEUE_DB", help="publish beat jobs to this local SQLite queue and collect results from workers")
+    parser.add_argument("--queue-listen", metavar="HOST:PORT", help="serve the coordinator's queue over HTTP for workers on other hosts (trusted network only)")
+    parser.add_argument("--worker", metavar="QUEUE", help="process beat jobs from a same-host SQLite queue file or a coordinator's http://HOST:PORT (project folders must be on shared storage)")
+    parser.add_argument("--idle-exit", type=float, metavar="SECONDS", help="stop a worker after this long without jobs")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    
+    if not validate_api_keys():
+        sys.exit(1)
+    
+    if args.worker:
+        run_worker(args.worker, args.beat_workers, args.idle_exit)
+        return
+    
+    if args.coordinator and args.queue_listen:
+        host, port = args.queue_listen.rsplit(":", 1)
+        serve_queue(JobQueue(args.coordinator), host, int(port))
+        print(f"\n📡 Serving job queue on http://{args.queue_listen}")
+    
+    if args.batch:
+        run_batch(args.batch, args.workers, args.budget, args.beat_workers, args.coordinator)
+        return
+    
+    script_text = get_script_input()
+    if not script_text.strip():
+        print("❌ No script provided. Exiting.")
+        sys.exit(1)
+    
+    project_title = get_project_title()
+    
+    summary = run_project(script_text, project_title, args.budget, args.beat_workers, args.coordinator)
+    print_summary(summary)
+
 if __name__ == "__main__":
     main()
@@ -1,5 +1,14 @@
-import requests
-from config import PEXELS_API_KEY, PIXABAY_API_KEY, PEXELS_VIDEO_URL, PEXELS_IMAGE_URL, PIXABAY_URL, PIXABAY_IMAGE_URL, NEGATIVE_KEYWORDS, CORPORATE_NEGATIVE
+import threading
+from config import SEARCH_TIMEOUT, PEXELS_API_KEY, PIXABAY_API_KEY, PEXELS_VIDEO_URL, PEXELS_IMAGE_URL, PIXABAY_URL, PIXABAY_IMAGE_URL, NEGATIVE_KEYWORDS, CORPORATE_NEGATIVE, PEXELS_RATE_LIMIT, PIXABAY_RATE_LIMIT
+from utils import get_session, RateLimiter, capped_timeout
+
+pexels_limiter = RateLimiter(*PEXELS_RATE_LIMIT)
+pixabay_limiter = RateLimiter(*PIXABAY_RATE_LIMIT)
+
+# Per-process only: Pixabay result URLs are temporary, so hits are not
+# worth keeping across runs
+_search_cache = {}
+_search_cache_lock = threading.Lock()
 
 def is_talking_head(video_data):
     tags = video_data.get('tags', '') if isinstance(video_data.get('tags'), str) else ''
@@ -18,11 +27,12 @@ def is_corporate_generic(video_data):
             return True
     return False
 
-def search_pexels_video(query, per_page=5):
+def search_pexels_video(query, per_page=5, deadline=None):
     headers = {"Authorization": PEXELS_API_KEY}
     params = {"query": query, "per_page": per_page, "orientation": "landscape"}
     
-    response = requests.get(PEXELS_VIDEO_URL, headers=headers, params=params)
+    pexels_limiter.wait(deadline)
+    response = get_session().get(PEXELS_VIDEO_URL, headers=headers, params=params, timeout=capped_timeout(SEARCH_TIMEOUT, deadline))
     
     if response.status_code == 429:
         return {"error": "rate_limit", "videos": []}
@@ -37,7 +47,7 @@ def search_pexels_video(query, per_page=5):
     
     return {"error": None, "videos": filtered}
 
-def search_pixabay_video(query, per_page=5):
+def search_pixabay_video(query, per_page=5, deadline=None):
     params = {
         "key": PIXABAY_API_KEY,
         "q": query,
@@ -46,7 +56,8 @@ def search_pixabay_video(query, per_page=5):
         "orientation": "horizontal"
     }
     
-    response = requests.get(PIXABAY_URL, params=params)
+    pixabay_limiter.wait(deadline)
+    response = get_session().get(PIXABAY_URL, params=params, timeout=capped_timeout(SEARCH_TIMEOUT, deadline))
     
     if response.status_code == 429:
         return {"error": "rate_limit", "videos": []}
@@ -61,11 +72,12 @@ def search_pixabay_video(query, per_page=5):
     
     return {"error": None, "videos": filtered}
 
-def search_pexels_image(query, per_page=3):
+def search_pexels_image(query, per_page=3, deadline=None):
     headers = {"Authorization": PEXELS_API_KEY}
     params = {"query": query, "per_page": per_page, "orientation": "landscape"}
     
-    response = requests.get(PEXELS_IMAGE_URL, headers=headers, params=params)
+    pexels_limiter.wait(deadline)
+    response = get_session().get(PEXELS_IMAGE_URL, headers=headers, params=params, timeout=capped_timeout(SEARCH_TIMEOUT, deadline))
     
     if response.status_code == 429:
         return {"error": "rate_limit", "photos": []}
@@ -76,7 +88,7 @@ def search_pexels_image(query, per_page=3):
     data = response.json()
     return {"error": None, "photos": data.get('photos', [])}
 
-def search_pixabay_image(query, per_page=3):
+def search_pixabay_image(query, per_page=3, deadline=None):
     params = {
         "key": PIXABAY_API_KEY,
         "q": query,
@@ -85,7 +97,8 @@ def search_pixabay_image(query, per_page=3):
         "orientation": "horizontal"
     }
     
-    response = requests.get(PIXABAY_IMAGE_URL, params=params)
+    pixabay_limiter.wait(deadline)
+    response = get_session().get(PIXABAY_IMAGE_URL, params=params, timeout=capped_timeout(SEARCH_TIMEOUT, deadline))
     
     if response.status_code == 429:
         return {"error": "rate_limit", "hits": []}
@@ -119,9 +132,30 @@ def get_pexels_image_url(photo):
 def get_pixabay_image_url(hit):
     return hit.get('largeImageURL') or hit.get('webformatURL')
 
-def search_media(query, media_type="video"):
+def get_cached_search(query, media_type="video"):
+    with _search_cache_lock:
+        return _search_cache.get((query.lower(), media_type))
+
+def search_media(query, media_type="video", deadline=None):
+    cached = get_cached_search(query, media_type)
+    if cached:
+        return cached
+
+    result = search_media_uncached(query, media_type, deadline)
+    # Only successful lookups are cached; rate limits and misses get retried
+    if result.get('url'):
+        with _search_cache_lock:
+            _search_cache[(query.lower(), media_type)] = result
+    return result
+
+def evict_cached_search(query, media_type="video"):
+    # Called when a cached URL fails to download so the next beat searches again
+    with _search_cache_lock:
+        _search_cache.pop((query.lower(), media_type), None)
+
+def search_media_uncached(query, media_type="video", deadline=None):
     if media_type == "video":
-        pexels_result = search_pexels_video(query)
+        pexels_result = search_pexels_video(query, deadline=deadline)
         if pexels_result['videos']:
             video = pexels_result['videos'][0]
             return {
@@ -131,7 +165,7 @@ def search_media(query, media_type="video"):
                 "error": None
             }
         
-        pixabay_result = search_pixabay_video(query)
+        pixabay_result = search_pixabay_video(query, deadline=deadline)
         if pixabay_result['videos']:
             video = pixabay_result['videos'][0]
             return {
@@ -149,7 +183,7 @@ def search_media(query, media_type="video"):
         }
     
     else:
-        pexels_result = search_pexels_image(query)
+        pexels_result = search_pexels_image(query, deadline=deadline)
         if pexels_result.get('photos'):
             photo = pexels_result['photos'][0]
             return {
@@ -159,7 +193,7 @@ def search_media(query, media_type="video"):
                 "error": None
             }
         
-        pixabay_result = search_pixabay_image(query)
+        pixabay_result = search_pixabay_image(query, deadline=deadline)
         if pixabay_result.get('hits'):
             hit = pixabay_result['hits'][0]
             return {
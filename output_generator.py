@@ -1,6 +1,7 @@
 import os
+import re
 import json
-from utils import ensure_directory, write_json, append_to_file, sanitize_filename
+from utils import ensure_directory, write_json_array_atomic, append_to_file, sanitize_filename, get_writer, close_writer
 
 def create_project_structure(project_title):
     safe_title = sanitize_filename(project_title)
@@ -15,6 +16,7 @@ def create_project_structure(project_title):
         "assets_dir": assets_dir,
         "image_prompts_path": os.path.join(project_dir, "Image_Prompts.txt"),
         "editing_notes_path": os.path.join(project_dir, "Editing_Notes.json"),
+        "editing_notes_stream_path": os.path.join(project_dir, "Editing_Notes.jsonl"),
         "manifest_path": os.path.join(project_dir, "manifest.txt")
     }
 
@@ -22,24 +24,61 @@ def add_image_prompt(prompts_path, index, phase, prompt):
     line = f"[{str(index).zfill(3)}_{phase}] {prompt}"
     append_to_file(prompts_path, line)
 
-def generate_editing_notes(notes_path, processed_beats, asset_results):
-    notes = []
-    
-    for beat_data, asset_data in zip(processed_beats, asset_results):
-        note = {
-            "index": beat_data['index'],
-            "beat_text": beat_data['beat'],
-            "phase": beat_data['phase'],
-            "asset_filename": asset_data['asset'].get('filename'),
-            "asset_type": asset_data['asset'].get('type'),
-            "instruction": asset_data['asset'].get('instruction'),
-            "sfx": beat_data['sfx'],
-            "overlay": asset_data.get('overlay')
-        }
-        notes.append(note)
-    
-    write_json(notes, notes_path)
-    return notes
+def build_editing_note(beat_data, asset_data):
+    return {
+        "index": beat_data['index'],
+        "beat_text": beat_data['beat'],
+        "phase": beat_data['phase'],
+        "asset_filename": asset_data['asset'].get('filename'),
+        "asset_type": asset_data['asset'].get('type'),
+        "instruction": asset_data['asset'].get('instruction'),
+        "sfx": beat_data['sfx'],
+        "overlay": asset_data.get('overlay')
+    }
+
+def iter_notes_by_index(stream_path):
+    # Only (index, offset) pairs are kept in memory; each note is re-read
+    # from the JSONL stream when it is written out
+    offsets = []
+    with open(stream_path, 'rb') as f:
+        offset = f.tell()
+        for line in iter(f.readline, b''):
+            if line.strip():
+                offsets.append((json.loads(line)['index'], offset))
+            offset = f.tell()
+        
+        for _, offset in sorted(offsets):
+            f.seek(offset)
+            yield json.loads(f.readline())
+
+def generate_editing_notes(notes_path, stream_path):
+    if not os.path.exists(stream_path):
+        return write_json_array_atomic([], notes_path)
+    return write_json_array_atomic(iter_notes_by_index(stream_path), notes_path)
+
+MANIFEST_ENTRY_PATTERN = re.compile(rb'^\[(?:SUCCESS|ERROR)\] \[(\d+)_')
+
+def sort_manifest(manifest_path):
+    # Beats are logged in completion order while the run is live; rewrite the
+    # entries in index order, keeping only (index, offset) pairs in memory
+    entries = []
+    temp_path = f"{manifest_path}.{os.getpid()}.tmp"
+    with open(manifest_path, 'rb') as f, open(temp_path, 'wb') as out:
+        offset = f.tell()
+        for line in iter(f.readline, b''):
+            match = MANIFEST_ENTRY_PATTERN.match(line)
+            if match:
+                entries.append((int(match.group(1)), offset))
+            else:
+                out.write(line)
+            offset = f.tell()
+        
+        for _, offset in sorted(entries):
+            f.seek(offset)
+            out.write(f.readline())
+        out.flush()
+        os.fsync(out.fileno())
+    os.replace(temp_path, manifest_path)
 
 def log_error(manifest_path, index, phase, error_msg):
     line = f"[ERROR] [{str(index).zfill(3)}_{phase}] {error_msg}"
@@ -50,31 +89,51 @@ def log_success(manifest_path, index, phase, asset_filename):
     append_to_file(manifest_path, line)
 
 def initialize_manifest(manifest_path, project_title):
-    with open(manifest_path, 'w') as f:
-        f.write(f"=== MANIFEST: {project_title} ===\n")
-        f.write(f"Generated by YouTube Visual Assets Generator\n")
-        f.write("=" * 50 + "\n\n")
+    writer = get_writer(manifest_path, 'w')
+    writer.write_line(f"=== MANIFEST: {project_title} ===")
+    writer.write_line(f"Generated by YouTube Visual Assets Generator")
+    writer.write_line("=" * 50 + "\n")
 
-def finalize_outputs(paths, processed_beats, asset_results, project_title):
+def start_project_outputs(paths, project_title):
     initialize_manifest(paths['manifest_path'], project_title)
+    get_writer(paths['editing_notes_stream_path'], 'w')
+    get_writer(paths['image_prompts_path'])
+
+def record_beat_output(paths, beat_data, asset_data):
+    get_writer(paths['editing_notes_stream_path']).write_line(
+        json.dumps(build_editing_note(beat_data, asset_data))
+    )
     
-    for beat_data, asset_data in zip(processed_beats, asset_results):
-        if asset_data['asset'].get('success'):
-            log_success(
-                paths['manifest_path'],
-                beat_data['index'],
-                beat_data['phase'],
-                asset_data['asset']['filename']
-            )
-        else:
-            log_error(
-                paths['manifest_path'],
-                beat_data['index'],
-                beat_data['phase'],
-                asset_data['asset'].get('error', 'Unknown error')
-            )
+    if asset_data['asset'].get('success'):
+        log_success(
+            paths['manifest_path'],
+            beat_data['index'],
+            beat_data['phase'],
+            asset_data['asset']['filename']
+        )
+    else:
+        log_error(
+            paths['manifest_path'],
+            beat_data['index'],
+            beat_data['phase'],
+            asset_data['asset'].get('error', 'Unknown error')
+        )
+    
+    # Flush once per beat so editors can follow a run in progress
+    for key in ('editing_notes_stream_path', 'manifest_path', 'image_prompts_path'):
+        get_writer(paths[key]).flush()
+
+def close_project_outputs(paths):
+    for key in ('editing_notes_stream_path', 'manifest_path', 'image_prompts_path'):
+        close_writer(paths[key])
+
+def finalize_outputs(paths, asset_results):
+    # Builds the final files from what record_beat_output streamed, so every
+    # beat must have been recorded before this is called
+    close_project_outputs(paths)
     
-    generate_editing_notes(paths['editing_notes_path'], processed_beats, asset_results)
+    sort_manifest(paths['manifest_path'])
+    generate_editing_notes(paths['editing_notes_path'], paths['editing_notes_stream_path'])
     
     return {
         "project_dir": paths['project_dir'],
@@ -0,0 +1,65 @@
+import os
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from config import OVERLAY_WORKERS, OVERLAY_INSTRUCTION
+from utils import NUMBER_PATTERN, create_text_overlay_png
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def get_overlay_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=OVERLAY_WORKERS, thread_name_prefix="overlay")
+        return _executor
+
+def extract_beat_numbers(processed_beats):
+    return {beat_data['index']: NUMBER_PATTERN.findall(beat_data['beat']) for beat_data in processed_beats}
+
+def submit_overlays(processed_beats, assets_dir):
+    # Renders each distinct overlay text once in the background; beats that
+    # share a text get a copy of the first render when collected.
+    executor = get_overlay_executor()
+    renders = {}
+    jobs = {}
+    
+    numbers_by_index = extract_beat_numbers(processed_beats)
+    
+    for beat_data in processed_beats:
+        index = beat_data['index']
+        numbers = numbers_by_index[index]
+        if not numbers:
+            continue
+        text = numbers[0]
+        filename = f"{str(index).zfill(3)}_{beat_data['phase']}_Overlay.png"
+        path = os.path.join(assets_dir, filename)
+        
+        if text not in renders:
+            renders[text] = (executor.submit(create_text_overlay_png, text, path), path)
+        future, source_path = renders[text]
+        jobs[index] = {
+            "future": future,
+            "source_path": source_path,
+            "path": path,
+            "filename": filename,
+            "text": text
+        }
+    
+    return jobs
+
+def collect_overlay(jobs, index):
+    job = jobs.get(index)
+    if not job:
+        return None
+    
+    job['future'].result()
+    if job['path'] != job['source_path']:
+        shutil.copyfile(job['source_path'], job['path'])
+    
+    return {
+        "filename": job['filename'],
+        "text": job['text'],
+        "instruction": OVERLAY_INSTRUCTION
+    }
@@ -0,0 +1,111 @@
+import time
+import threading
+from concurrent.futures import Future, wait, FIRST_COMPLETED
+from config import PHASE_PRIORITY, SCHEDULER_WORKERS
+from llm_processor import template_ai_prompt
+from media_search import get_cached_search
+from asset_processor import create_asset, create_number_overlay
+from overlay_engine import collect_overlay
+from utils import DeadlineExceeded
+from output_generator import add_image_prompt, record_beat_output
+
+def is_cheap(beat_data):
+    analysis = beat_data['analysis']
+    if analysis.get('type') == 'historical' and not analysis.get('is_abstract'):
+        return get_cached_search(analysis.get('search_query', beat_data['beat']), "video") is not None
+    meme = analysis.get('meme_suggestion')
+    return bool(meme) and get_cached_search(meme, "image") is not None
+
+def beat_priority(beat_data):
+    return (
+        PHASE_PRIORITY.get(beat_data['phase'], len(PHASE_PRIORITY)),
+        0 if is_cheap(beat_data) else 1,
+        beat_data['index']
+    )
+
+def degrade_beat(beat_data, paths, overlay_jobs=None, reason="deadline_exceeded"):
+    ai_prompt = template_ai_prompt(beat_data['beat'])
+    add_image_prompt(paths['image_prompts_path'], beat_data['index'], beat_data['phase'], ai_prompt)
+    asset = create_asset(
+        beat_data,
+        {"url": None, "type": None, "error": reason},
+        paths['assets_dir'],
+        beat_data['index'],
+        beat_data['phase']
+    )
+    if overlay_jobs is not None:
+        overlay = collect_overlay(overlay_jobs, beat_data['index'])
+    else:
+        overlay = create_number_overlay(beat_data['beat'], paths['assets_dir'], beat_data['index'], beat_data['phase'])
+    return {"asset": asset, "ai_prompt": ai_prompt, "overlay": overlay}
+
+def submit_daemon(fn, *args):
+    # ThreadPoolExecutor threads are joined at interpreter exit, so a beat
+    # stuck past the deadline would hold up the run; daemon threads are not
+    future = Future()
+    def run():
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(fn(*args))
+        except BaseException as e:
+            future.set_exception(e)
+    threading.Thread(target=run, name=f"beat-{args[0]['index']:03d}", daemon=True).start()
+    return future
+
+def run_with_deadline(processed_beats, paths, process_fn, budget_seconds, overlay_jobs=None, workers=SCHEDULER_WORKERS):
+    # Runs process_fn(beat_data, paths, overlay_jobs, False, deadline) for
+    # beats in phase-priority order until the budget runs out, then fills the
+    # rest with placeholders. Beats still in flight see the same deadline and
+    # stop at their next search, download read or prompt call.
+    deadline = time.monotonic() + budget_seconds
+    queue = list(processed_beats)
+    results = {}
+    pending = {}
+    
+    def finish(beat_data, result):
+        if result.get('ai_prompt'):
+            add_image_prompt(paths['image_prompts_path'], beat_data['index'], beat_data['phase'], result['ai_prompt'])
+        results[beat_data['index']] = result
+        record_beat_output(paths, beat_data, result)
+    
+    def start_next():
+        if time.monotonic() >= deadline:
+            return
+        if not queue:
+            return
+        # Re-ranked on every pick: a query resolved by an earlier beat makes
+        # later beats with the same query cheap
+        beat_data = min(queue, key=beat_priority)
+        queue.remove(beat_data)
+        pending[submit_daemon(process_fn, beat_data, paths, overlay_jobs, False, deadline)] = beat_data
+    
+    for _ in range(workers):
+        start_next()
+    
+    while pending:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        done, _ = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+        for future in done:
+            beat_data = pending.pop(future)
+            try:
+                finish(beat_data, future.result())
+            except Exception as e:
+                if not isinstance(e, DeadlineExceeded):
+                    print(f"  [{beat_data['index']:03d}] ❌ Beat failed: {e}")
+                result = degrade_beat(beat_data, paths, overlay_jobs, reason=str(e) or type(e).__name__)
+                results[beat_data['index']] = result
+                record_beat_output(paths, beat_data, result)
+            start_next()
+    
+    degraded = [b for b in processed_beats if b['index'] not in results]
+    if degraded:
+        print(f"\n⏰ Deadline reached: {len(degraded)} beats fall back to placeholders + AI prompts")
+    for beat_data in degraded:
+        result = degrade_beat(beat_data, paths, overlay_jobs)
+        results[beat_data['index']] = result
+        record_beat_output(paths, beat_data, result)
+    
+    return [results[b['index']] for b in processed_beats]
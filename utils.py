@@ -1,32 +1,94 @@
 import os
 import requests
 import json
+import re
+import threading
+import time
+from functools import lru_cache
+from requests.adapters import HTTPAdapter
 from PIL import Image, ImageDraw, ImageFont
+from config import HTTP_POOL_SIZE, OUTPUT_BUFFER_SIZE, OVERLAY_FONT_SIZE, OVERLAY_FONT_PATHS
+
+NUMBER_PATTERN = re.compile(r'[\$€£]?\d+(?:,\d{3})*(?:\.\d+)?(?:%|M|B|K)?')
+
+_session = None
+_session_lock = threading.Lock()
+
+def get_session():
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+            _session.mount("http://", adapter)
+            _session.mount("https://", adapter)
+        return _session
+
+class DeadlineExceeded(Exception):
+    pass
+
+def check_deadline(deadline):
+    if deadline is not None and time.monotonic() >= deadline:
+        raise DeadlineExceeded("deadline_exceeded")
+
+def capped_timeout(timeout, deadline):
+    # (connect, read) timeout shortened to whatever is left before the deadline
+    if deadline is None:
+        return timeout
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise DeadlineExceeded("deadline_exceeded")
+    return (min(timeout[0], remaining), min(timeout[1], remaining))
+
+class RateLimiter:
+    # Token bucket: up to max_requests calls go through immediately, then
+    # callers wait for tokens refilled at max_requests per period
+    def __init__(self, max_requests, period):
+        self.capacity = float(max_requests)
+        self.rate = max_requests / period
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def wait(self, deadline=None):
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            delay = max(0.0, (1 - self.tokens) / self.rate)
+            # Don't reserve a token the caller could never use
+            if deadline is not None and now + delay >= deadline:
+                raise DeadlineExceeded("deadline_exceeded")
+            self.tokens -= 1
+        if delay > 0:
+            time.sleep(delay)
 
 def ensure_directory(path):
     os.makedirs(path, exist_ok=True)
     return path
 
-def download_file(url, filepath, headers=None):
-    response = requests.get(url, headers=headers, stream=True)
-    if response.status_code == 200:
-        with open(filepath, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                f.write(chunk)
-        return True
-    return False
-
 def create_black_placeholder(filepath, width=1920, height=1080):
     img = Image.new('RGB', (width, height), color='black')
     img.save(filepath)
     return filepath
 
-def create_text_overlay_png(text, filepath, width=1920, height=1080):
+@lru_cache(maxsize=None)
+def get_font(size):
+    for path in OVERLAY_FONT_PATHS:
+        try:
+            return ImageFont.truetype(path, size)
+        except OSError:
+            continue
+    try:
+        return ImageFont.load_default(size=size)
+    except TypeError:
+        return ImageFont.load_default()
+
+def create_text_overlay_png(text, filepath, width=1920, height=1080, font_size=OVERLAY_FONT_SIZE):
     img = Image.new('RGBA', (width, height), (0, 0, 0, 0))
     draw = ImageDraw.Draw(img)
     
-    font_size = 120
-    font = ImageFont.load_default()
+    font = get_font(font_size)
     
     bbox = draw.textbbox((0, 0), text, font=font)
     text_width = bbox[2] - bbox[0]
@@ -42,25 +104,76 @@ def create_text_overlay_png(text, filepath, width=1920, height=1080):
     return filepath
 
 def extract_numbers(text):
-    import re
-    numbers = re.findall(r'[\$€£]?\d+(?:,\d{3})*(?:\.\d+)?(?:%|M|B|K)?', text)
-    return numbers
+    return NUMBER_PATTERN.findall(text)
 
 def contains_number_or_currency(text):
-    import re
-    return bool(re.search(r'[\$€£]?\d+(?:,\d{3})*(?:\.\d+)?(?:%|M|B|K)?', text))
+    return bool(NUMBER_PATTERN.search(text))
 
 def sanitize_filename(name):
-    import re
     return re.sub(r'[^\w\s-]', '', name).strip().replace(' ', '_')[:50]
 
 def write_json(data, filepath):
     with open(filepath, 'w') as f:
         json.dump(data, f, indent=2)
 
+def write_json_array_atomic(items, filepath):
+    # Same layout as write_json(list, ...) but written one item at a time,
+    # so the whole array never has to be held in memory
+    temp_path = f"{filepath}.{os.getpid()}.tmp"
+    with open(temp_path, 'w') as f:
+        count = 0
+        for item in items:
+            f.write("[\n" if count == 0 else ",\n")
+            f.write("\n".join("  " + line for line in json.dumps(item, indent=2).split("\n")))
+            count += 1
+        f.write("\n]" if count else "[]")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, filepath)
+    return count
+
+class LineWriter:
+    def __init__(self, filepath, mode='a'):
+        self.filepath = filepath
+        self.file = open(filepath, mode, buffering=OUTPUT_BUFFER_SIZE)
+        self.lock = threading.Lock()
+
+    def write_line(self, content):
+        with self.lock:
+            self.file.write(content + '\n')
+
+    def flush(self):
+        with self.lock:
+            self.file.flush()
+
+    def close(self):
+        with self.lock:
+            self.file.close()
+
+_writers = {}
+_writers_lock = threading.Lock()
+
+def get_writer(filepath, mode='a'):
+    # 'w' always truncates: a writer left registered by an earlier run is
+    # closed and replaced rather than silently appended to
+    with _writers_lock:
+        writer = _writers.get(filepath)
+        if writer is not None and mode == 'w':
+            writer.close()
+            writer = None
+        if writer is None:
+            writer = LineWriter(filepath, mode)
+            _writers[filepath] = writer
+        return writer
+
+def close_writer(filepath):
+    with _writers_lock:
+        writer = _writers.pop(filepath, None)
+    if writer:
+        writer.close()
+
 def append_to_file(filepath, content):
-    with open(filepath, 'a') as f:
-        f.write(content + '\n')
+    get_writer(filepath).write_line(content)
 
 def get_video_duration(filepath):
     import subprocess